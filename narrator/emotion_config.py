@@ -1,12 +1,19 @@
 """Load emotion to Piper parameter mappings."""
 
+import functools
 import json
-from dataclasses import dataclass
-from typing import Dict, Optional
+import os
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Tuple
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-@dataclass
-class EmotionConfig:
+
+class EmotionConfig(NamedTuple):
     """Piper synthesis parameters for an emotion."""
     length_scale: float
     noise_scale: float
@@ -14,6 +21,49 @@ class EmotionConfig:
     description: str = ""
 
 
+@functools.lru_cache(maxsize=8)
+def _load_emotions(
+    config_path: str,
+    mtime: float
+) -> Tuple[Mapping[str, EmotionConfig], Mapping[str, int]]:
+    """Parse an emotions config file into read-only mappings.
+    
+    Cached per (path, mtime), so unchanged files are parsed once and
+    edited files are picked up again. The cache is bounded so stale
+    parses of edited files are eventually dropped.
+    
+    Args:
+        config_path: Absolute path to emotions JSON config
+        mtime: Modification time of the file, part of the cache key
+        
+    Returns:
+        Tuple of (emotion name -> EmotionConfig, pause type -> ms)
+    """
+    with open(config_path, 'rb') as f:
+        data = _json_loads(f.read())
+    
+    # Load emotions
+    emotions = {
+        name: EmotionConfig(
+            length_scale=params.get("length_scale", 1.0),
+            noise_scale=params.get("noise_scale", 0.5),
+            noise_w=params.get("noise_w", 0.6),
+            description=params.get("description", "")
+        )
+        for name, params in data.get("emotions", {}).items()
+    }
+    
+    # Load pauses
+    pauses = data.get("pauses", {
+        "short": 250,
+        "medium": 500,
+        "long": 1000,
+        "very_long": 2000
+    })
+    
+    return MappingProxyType(emotions), MappingProxyType(dict(pauses))
+
+
 class EmotionMapper:
     """Map emotion names to Piper SynthesisConfig parameters."""
     
@@ -31,31 +81,16 @@ class EmotionMapper:
             config_path: Path to emotions JSON config
         """
         self.config_path = config_path
-        self.emotions: Dict[str, EmotionConfig] = {}
-        self.pauses: Dict[str, int] = {}
+        self.emotions: Mapping[str, EmotionConfig] = {}
+        self.pauses: Mapping[str, int] = {}
         self._load_config()
     
     def _load_config(self):
         """Load emotion mappings from config file."""
-        with open(self.config_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Load emotions
-        for name, params in data.get("emotions", {}).items():
-            self.emotions[name] = EmotionConfig(
-                length_scale=params.get("length_scale", 1.0),
-                noise_scale=params.get("noise_scale", 0.5),
-                noise_w=params.get("noise_w", 0.6),
-                description=params.get("description", "")
-            )
-        
-        # Load pauses
-        self.pauses = data.get("pauses", {
-            "short": 250,
-            "medium": 500,
-            "long": 1000,
-            "very_long": 2000
-        })
+        self.emotions, self.pauses = _load_emotions(
+            os.path.abspath(self.config_path),
+            os.path.getmtime(self.config_path)
+        )
     
     def get_config(self, emotion: str) -> EmotionConfig:
         """Get Piper config for an emotion.
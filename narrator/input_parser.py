@@ -1,9 +1,19 @@
 """Parse JSON input with text and emotion tags."""
 
 import json
+import re
 from dataclasses import dataclass
 from typing import List, Optional
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Whitespace following sentence-ending punctuation
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
 
 @dataclass
 class Segment:
@@ -16,9 +26,19 @@ class Segment:
 class InputParser:
     """Parse narration input JSON into segments."""
     
-    def __init__(self, config_path: Optional[str] = None):
-        """Initialize parser with optional config path."""
+    def __init__(
+        self,
+        config_path: Optional[str] = None,
+        split_sentences: bool = False
+    ):
+        """Initialize parser with optional config path.
+        
+        Args:
+            config_path: Optional path to config
+            split_sentences: Split each segment into one Segment per sentence
+        """
         self.config_path = config_path
+        self.split_sentences = split_sentences
     
     def parse(self, input_data: dict) -> List[Segment]:
         """Parse JSON dict into list of Segments.
@@ -38,10 +58,34 @@ class InputParser:
                 emotion=seg.get("emotion", "neutral"),
                 pause_after=seg.get("pause_after", "medium")
             )
-            segments.append(segment)
+            if self.split_sentences:
+                segments.extend(self._split(segment))
+            else:
+                segments.append(segment)
         
         return segments
     
+    def _split(self, segment: Segment) -> List[Segment]:
+        """Split a segment into one Segment per sentence.
+        
+        Sentences inside the segment are separated by a short pause; the
+        segment's own pause follows only its last sentence.
+        """
+        sentences = [s for s in _SENTENCE_BOUNDARY.split(segment.text.strip()) if s]
+        if len(sentences) <= 1:
+            return [segment]
+        
+        parts = [
+            Segment(text=sentence, emotion=segment.emotion, pause_after="short")
+            for sentence in sentences[:-1]
+        ]
+        parts.append(Segment(
+            text=sentences[-1],
+            emotion=segment.emotion,
+            pause_after=segment.pause_after
+        ))
+        return parts
+    
     def parse_file(self, filepath: str) -> List[Segment]:
         """Parse JSON file into list of Segments.
         
@@ -51,6 +95,6 @@ class InputParser:
         Returns:
             List of Segment objects
         """
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(filepath, 'rb') as f:
+            data = _json_loads(f.read())
         return self.parse(data)
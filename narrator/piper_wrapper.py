@@ -1,27 +1,83 @@
 """Piper TTS wrapper for generating audio with emotion."""
 
-import io
-import wave
+import functools
+import json
+import os
+import struct
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Union
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
 
 try:
+    import onnxruntime
     from piper import PiperVoice
+    from piper.config import PiperConfig
     PIPER_AVAILABLE = True
 except ImportError:
     PIPER_AVAILABLE = False
 
 from .emotion_config import EmotionConfig
 
+# Audio format produced by Piper voices: 16-bit mono PCM at 22.05kHz
+SAMPLE_RATE = 22050
+SAMPLE_WIDTH = 2
+CHANNELS = 1
+
+
+def wav_header(data_size: int) -> bytes:
+    """Build a 44-byte PCM WAV header for data_size bytes of audio.
+    
+    Args:
+        data_size: Length of the PCM payload in bytes
+        
+    Returns:
+        RIFF/WAVE header in the pipeline's sample format
+    """
+    block_align = SAMPLE_WIDTH * CHANNELS
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, CHANNELS, SAMPLE_RATE,
+        SAMPLE_RATE * block_align, block_align, SAMPLE_WIDTH * 8,
+        b'data', data_size
+    )
+
+
+# espeak-ng keeps global state, so phonemization must not run concurrently
+# even though the ONNX runs themselves may.
+_PHONEMIZE_LOCK = threading.Lock()
+
+# Loaded voices keyed by (model path, mtime, worker count). ONNX Runtime
+# sessions are safe to run from several threads, so one load is shared.
+# Each entry holds a whole session, so stale models are dropped and the
+# cache is bounded, oldest entry first.
+_VOICE_CACHE: Dict[Tuple[str, float, int], "PiperVoice"] = {}
+_VOICE_CACHE_MAXSIZE = 4
+
 
 class PiperWrapper:
     """Wrapper around piper-tts for emotional narration."""
     
-    def __init__(self, model_path: str):
+    def __init__(
+        self,
+        model_path: str,
+        workers: int = 1,
+        prefer_quantized: bool = True
+    ):
         """Initialize Piper voice model.
         
+        If an int8 copy of the model (``<model>.int8.onnx``, see
+        ``scripts/quantize_piper.py``) sits next to it, that copy is loaded
+        instead unless prefer_quantized is False. If the copy fails to load,
+        the original model is used and a warning is printed.
+        
         Args:
             model_path: Path to Piper .onnx model file
+            workers: Number of concurrent syntheses the session is tuned for
+            prefer_quantized: Whether to use an int8 copy when present
         """
         if not PIPER_AVAILABLE:
             raise RuntimeError(
@@ -29,8 +85,19 @@ class PiperWrapper:
                 "Install with: pip install piper-tts"
             )
         
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        
         self.model_path = model_path
+        self.onnx_path = model_path
+        self.workers = workers
         self.voice = None
+        self._synthesizers: Dict[EmotionConfig, Callable[[str], Iterator[bytes]]] = {}
+        
+        quantized_path = Path(model_path).with_suffix('.int8.onnx')
+        if prefer_quantized and quantized_path.exists():
+            self.onnx_path = str(quantized_path)
+        
         self._load_voice()
     
     def _load_voice(self):
@@ -38,7 +105,61 @@ class PiperWrapper:
         if not Path(self.model_path).exists():
             raise FileNotFoundError(f"Piper model not found: {self.model_path}")
         
-        self.voice = PiperVoice.load(self.model_path)
+        try:
+            self.voice = self._cached_voice()
+        except Exception as e:
+            if self.onnx_path == self.model_path:
+                raise
+            print(
+                f"Warning: could not load quantized model {self.onnx_path} ({e}); "
+                f"falling back to {self.model_path}",
+                file=sys.stderr
+            )
+            self.onnx_path = self.model_path
+            self.voice = self._cached_voice()
+    
+    def _cached_voice(self) -> "PiperVoice":
+        """Return the shared voice for onnx_path, building it on first use."""
+        key = (
+            os.path.abspath(self.onnx_path),
+            os.path.getmtime(self.onnx_path),
+            self.workers
+        )
+        voice = _VOICE_CACHE.get(key)
+        if voice is None:
+            voice = self._build_voice()
+            # Sessions for an older version of this model are never hit again
+            for cached_key in list(_VOICE_CACHE):
+                if cached_key[0] == key[0] and cached_key[1] != key[1]:
+                    del _VOICE_CACHE[cached_key]
+            while len(_VOICE_CACHE) >= _VOICE_CACHE_MAXSIZE:
+                del _VOICE_CACHE[next(iter(_VOICE_CACHE))]
+            _VOICE_CACHE[key] = voice
+        return voice
+    
+    def _build_voice(self) -> "PiperVoice":
+        """Create a PiperVoice with a session tuned for the worker count."""
+        # The voice config always sits next to the original model
+        with open(f"{self.model_path}.json", 'r', encoding='utf-8') as f:
+            config = PiperConfig.from_dict(json.load(f))
+        
+        sess_options = onnxruntime.SessionOptions()
+        sess_options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        sess_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        sess_options.enable_profiling = False
+        sess_options.enable_mem_pattern = True
+        sess_options.enable_cpu_mem_arena = True
+        # Split the cores between concurrent synthesis workers
+        sess_options.intra_op_num_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        
+        session = onnxruntime.InferenceSession(
+            str(self.onnx_path),
+            sess_options=sess_options,
+            providers=['CPUExecutionProvider']
+        )
+        return PiperVoice(session=session, config=config)
     
     def synthesize(
         self,
@@ -52,7 +173,41 @@ class PiperWrapper:
             config: Emotion config (uses default if None)
             
         Returns:
-            Raw WAV audio bytes
+            Raw 16-bit mono PCM bytes (no WAV header)
+        """
+        return b"".join(self.synthesizer(config)(text))
+    
+    def synthesize_stream(
+        self,
+        text: str,
+        config: Optional[EmotionConfig] = None
+    ) -> Iterator[bytes]:
+        """Synthesize audio incrementally, one sentence at a time.
+        
+        Args:
+            text: Text to synthesize
+            config: Emotion config (uses default if None)
+            
+        Yields:
+            Raw 16-bit mono PCM bytes for each sentence as Piper produces it
+        """
+        yield from self.synthesizer(config)(text)
+    
+    def synthesizer(
+        self,
+        config: Optional[EmotionConfig] = None
+    ) -> Callable[[str], Iterator[bytes]]:
+        """Return a streaming synthesis function specialized for one config.
+        
+        The emotion parameters are bound once per distinct config, so the
+        per-sentence call carries no keyword unpacking. Functions are
+        cached, and audiobooks only use a handful of emotions.
+        
+        Args:
+            config: Emotion config (uses default if None)
+            
+        Returns:
+            Function mapping text to an iterator of raw PCM chunks
         """
         if config is None:
             config = EmotionConfig(
@@ -61,36 +216,64 @@ class PiperWrapper:
                 noise_w=0.6
             )
         
-        # Create synthesis config
-        synthesis_config = self.voice.config
-        
-        # Set emotion parameters via native SynthesisConfig
-        # Piper uses these parameters directly, no SSML needed
-        if hasattr(synthesis_config, 'length_scale'):
-            synthesis_config.length_scale = config.length_scale
-        if hasattr(synthesis_config, 'noise_scale'):
-            synthesis_config.noise_scale = config.noise_scale
-        if hasattr(synthesis_config, 'noise_w'):
-            synthesis_config.noise_w = config.noise_w
-        
-        # Synthesize to bytes buffer
-        audio_buffer = io.BytesIO()
-        
-        with wave.open(audio_buffer, 'wb') as wav_file:
-            wav_file.setnchannels(1)  # Mono
-            wav_file.setsampwidth(2)  # 16-bit
-            wav_file.setframerate(22050)  # 22.05kHz
-            
-            # Generate audio
-            for audio_bytes in self.voice.synthesize_stream_raw(
-                text,
+        synthesize_text = self._synthesizers.get(config)
+        if synthesize_text is None:
+            # Emotion parameters go straight to Piper as kwargs; the shared
+            # voice config is never mutated, so concurrent calls are safe.
+            synthesize_ids = functools.partial(
+                self.voice.synthesize_ids_to_raw,
                 length_scale=config.length_scale,
                 noise_scale=config.noise_scale,
                 noise_w=config.noise_w
-            ):
-                wav_file.writeframes(audio_bytes)
+            )
+            phonemize = self.voice.phonemize
+            phonemes_to_ids = self.voice.phonemes_to_ids
+            
+            def synthesize_text(text: str) -> Iterator[bytes]:
+                with _PHONEMIZE_LOCK:
+                    sentence_phonemes = phonemize(text)
+                
+                # Generate audio, one sentence per ONNX run
+                for phonemes in sentence_phonemes:
+                    yield synthesize_ids(phonemes_to_ids(phonemes))
+            
+            self._synthesizers[config] = synthesize_text
+        
+        return synthesize_text
+    
+    def synthesize_batch(
+        self,
+        jobs: Iterable[Tuple[str, Optional[EmotionConfig]]],
+        workers: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Synthesize many texts concurrently, yielding audio in input order.
         
-        return audio_buffer.getvalue()
+        At most ``workers`` syntheses run at once, with one more queued so
+        the pool stays busy while the caller consumes the oldest result.
+        All pool threads share the loaded ONNX session.
+        
+        Args:
+            jobs: Iterable of (text, emotion config) pairs
+            workers: Number of concurrent Piper invocations (defaults to
+                the count the wrapper was created with)
+            
+        Yields:
+            Raw PCM audio bytes, in the same order as ``jobs``
+        """
+        if workers is None:
+            workers = self.workers
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for text, config in jobs:
+                if len(pending) > workers:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(self.synthesize, text, config))
+            
+            while pending:
+                yield pending.popleft().result()
     
     def synthesize_to_file(
         self,
@@ -105,6 +288,7 @@ class PiperWrapper:
             output_path: Output WAV file path
             config: Emotion config
         """
-        audio_bytes = self.synthesize(text, config)
+        pcm = self.synthesize(text, config)
         with open(output_path, 'wb') as f:
-            f.write(audio_bytes)
+            f.write(wav_header(len(pcm)))
+            f.write(pcm)
@@ -1,37 +1,331 @@
-"""Post-processor for concatenating audio and injecting silences."""
+"""Post-processors for concatenating audio, injecting silences and export.
 
+FastPostProcessor works on raw PCM with NumPy and ffmpeg pipes and is the
+default. PydubPostProcessor adds the AudioSegment-based API on top of it
+for callers that still use pydub, which is an optional dependency.
+"""
+
+import contextlib
 import io
+import shutil
 import subprocess
 import tempfile
-from pathlib import Path
-from typing import List
+import threading
+import wave
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .piper_wrapper import CHANNELS, SAMPLE_RATE, SAMPLE_WIDTH
+
+# pydub is imported on first use so the default path never loads it
+AudioSegment = None
+PYDUB_AVAILABLE = None
 
-try:
-    from pydub import AudioSegment
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
+
+def _import_pydub() -> bool:
+    """Import pydub on demand and report whether it is available."""
+    global AudioSegment, PYDUB_AVAILABLE
+    if PYDUB_AVAILABLE is None:
+        try:
+            from pydub import AudioSegment
+            PYDUB_AVAILABLE = True
+        except ImportError:
+            PYDUB_AVAILABLE = False
+    return PYDUB_AVAILABLE
 
 
-class PostProcessor:
-    """Concatenate audio segments and inject pauses."""
+class FastPostProcessor:
+    """Concatenate PCM segments, inject pauses and export via ffmpeg."""
+    
+    # ffmpeg audio encoder for each supported output format
+    CODECS = {
+        'mp3': 'libmp3lame',
+        'ogg': 'libvorbis',
+        'wav': 'pcm_s16le',
+    }
+    
+    # Default EBU R128 loudness target
+    LOUDNORM = 'loudnorm=I=-16:TP=-1.5:LRA=11'
+    
+    def concat_numpy(
+        self,
+        pcm_segments: List[bytes],
+        pause_ms: List[int],
+        sr: int = SAMPLE_RATE
+    ) -> np.ndarray:
+        """Concatenate PCM segments with pauses into one int16 array.
+        
+        Args:
+            pcm_segments: List of raw 16-bit mono PCM bytes
+            pause_ms: List of pause durations after each segment
+            sr: Sample rate used to size the pauses
+            
+        Returns:
+            Contiguous int16 array of samples
+        """
+        # np.frombuffer wraps the bytes without copying
+        arrays = [np.frombuffer(b, dtype=np.int16) for b in pcm_segments]
+        
+        # Pause lengths in samples (none after the last segment)
+        pauses = [
+            int((pause_ms[i] if i < len(pause_ms) else 500) * sr / 1000)
+            for i in range(len(arrays) - 1)
+        ]
+        
+        # Write everything into one preallocated buffer rather than
+        # building silence arrays for np.concatenate to copy again
+        samples = np.empty(sum(len(a) for a in arrays) + sum(pauses), dtype=np.int16)
+        pos = 0
+        
+        for i, segment in enumerate(arrays):
+            samples[pos:pos + len(segment)] = segment
+            pos += len(segment)
+            
+            if i < len(pauses):
+                samples[pos:pos + pauses[i]] = 0
+                pos += pauses[i]
+        
+        return samples
+    
+    def export_array(
+        self,
+        samples: np.ndarray,
+        output_path: str,
+        format: str = "mp3",
+        normalize: bool = True
+    ):
+        """Export an int16 sample array to file with optional normalization.
+        
+        Args:
+            samples: Mono int16 samples at SAMPLE_RATE
+            output_path: Output file path
+            format: Output format (mp3, wav, ogg)
+            normalize: Whether to apply loudness normalization
+        """
+        pcm = memoryview(np.ascontiguousarray(samples, dtype=np.int16)).cast('B')
+        
+        if format == 'wav' and not normalize:
+            with wave.open(output_path, 'wb') as wav_file:
+                wav_file.setnchannels(CHANNELS)
+                wav_file.setsampwidth(SAMPLE_WIDTH)
+                wav_file.setframerate(SAMPLE_RATE)
+                wav_file.writeframes(pcm)
+        else:
+            self._encode_pcm(
+                [pcm],
+                output_path,
+                format,
+                self.LOUDNORM if normalize else None
+            )
+    
+    def normalize_numpy(
+        self,
+        samples: np.ndarray,
+        target_dbfs: float = -16.0,
+        peak_dbfs: float = -1.5
+    ) -> np.ndarray:
+        """Normalize int16 samples to a target RMS level in-process.
+        
+        A single gain is applied to the whole buffer. It aims for
+        target_dbfs RMS but is capped so the peak stays at or below
+        peak_dbfs, so nothing is clipped. This is a fast alternative to
+        ffmpeg loudnorm when strict EBU R128 compliance is not required.
+        
+        Args:
+            samples: Mono int16 samples
+            target_dbfs: Target RMS level in dBFS (default -16)
+            peak_dbfs: Peak ceiling in dBFS (default -1.5)
+            
+        Returns:
+            Normalized int16 samples
+        """
+        scaled = samples.astype(np.float32)
+        if not scaled.size:
+            return samples.copy()
+        
+        # dot and max/min reduce in place, with no further full-size copies
+        rms = float(np.sqrt(np.dot(scaled, scaled) / scaled.size))
+        peak = float(max(scaled.max(), -scaled.min()))
+        if peak == 0:
+            return samples.copy()
+        
+        ceiling = 32767 * 10 ** (peak_dbfs / 20)
+        gain = min(32768 * 10 ** (target_dbfs / 20) / rms, ceiling / peak)
+        
+        np.multiply(scaled, gain, out=scaled)
+        np.clip(scaled, -ceiling, ceiling, out=scaled)
+        return scaled.astype(np.int16)
+    
+    def export_concat_via_ffmpeg(
+        self,
+        pcm_segments: Iterable[bytes],
+        pause_ms: List[int],
+        output_path: str,
+        format: str = "mp3",
+        normalize: bool = True
+    ):
+        """Concatenate, normalize and encode PCM segments with one ffmpeg call.
+        
+        Segments are consumed lazily and piped, with their pauses as
+        silence, straight into a single ffmpeg process that applies loudnorm
+        and encodes, so memory use does not grow with the length of the book
+        and nothing is staged on disk. Unnormalized WAV output is written
+        directly without ffmpeg.
+        
+        Args:
+            pcm_segments: Iterable of raw 16-bit mono PCM bytes
+            pause_ms: List of pause durations after each segment
+            output_path: Output file path
+            format: Output format (mp3, wav, ogg)
+            normalize: Whether to apply loudness normalization
+        """
+        chunks = self._with_pauses(pcm_segments, pause_ms)
+        
+        if format == 'wav' and not normalize:
+            with wave.open(output_path, 'wb') as wav_file:
+                wav_file.setnchannels(CHANNELS)
+                wav_file.setsampwidth(SAMPLE_WIDTH)
+                wav_file.setframerate(SAMPLE_RATE)
+                for chunk in chunks:
+                    wav_file.writeframes(chunk)
+        else:
+            self._encode_pcm(
+                chunks,
+                output_path,
+                format,
+                self.LOUDNORM if normalize else None
+            )
+    
+    def _with_pauses(
+        self,
+        pcm_segments: Iterable[bytes],
+        pause_ms: List[int]
+    ) -> Iterator[bytes]:
+        """Yield PCM segments interleaved with their pauses as silence."""
+        frame_bytes = SAMPLE_WIDTH * CHANNELS
+        
+        for i, segment_pcm in enumerate(pcm_segments):
+            # Add the previous segment's pause (none after the last one)
+            if i > 0:
+                pause_duration = pause_ms[i - 1] if i - 1 < len(pause_ms) else 500
+                yield bytes(int(pause_duration * SAMPLE_RATE / 1000) * frame_bytes)
+            
+            yield segment_pcm
+    
+    def _ffmpeg_command(
+        self,
+        output: str,
+        format: str,
+        audio_filter: Optional[str] = None
+    ) -> List[str]:
+        """Build an ffmpeg command that reads raw PCM from stdin."""
+        cmd = [
+            'ffmpeg',
+            '-y',  # Overwrite output
+            '-loglevel', 'error',
+            '-f', 's16le',
+            '-ar', str(SAMPLE_RATE),
+            '-ac', str(CHANNELS),
+            '-i', 'pipe:0',
+        ]
+        if audio_filter:
+            cmd += ['-af', audio_filter]
+        cmd += [
+            '-ar', str(SAMPLE_RATE),
+            '-ac', str(CHANNELS),
+            '-c:a', self.CODECS[format],
+            '-f', format,
+            output
+        ]
+        return cmd
+    
+    def _encode_pcm(
+        self,
+        chunks: Iterable[bytes],
+        output_path: str,
+        format: str,
+        audio_filter: Optional[str] = None
+    ):
+        """Pipe raw PCM chunks through one ffmpeg process into output_path."""
+        cmd = self._ffmpeg_command(output_path, format, audio_filter)
+        self._run_ffmpeg(cmd, chunks, 'export')
+    
+    def _run_ffmpeg(
+        self,
+        cmd: List[str],
+        chunks: Iterable[bytes],
+        action: str,
+        sink: Optional[BinaryIO] = None
+    ):
+        """Run ffmpeg with raw PCM chunks on stdin.
+        
+        If sink is given, ffmpeg's stdout is copied into it in 1 MiB
+        blocks while a helper thread feeds stdin, so neither side of the
+        pipe ever holds the whole output.
+        """
+        # stderr goes to a file so a chatty ffmpeg can never block the writer
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE if sink is not None else None,
+                stderr=stderr
+            )
+            errors = []
+            
+            def feed():
+                try:
+                    for chunk in chunks:
+                        proc.stdin.write(chunk)
+                except BrokenPipeError:
+                    # ffmpeg exited early; its stderr is reported below
+                    pass
+                except BaseException as e:
+                    errors.append(e)
+                    proc.kill()
+                finally:
+                    with contextlib.suppress(BrokenPipeError):
+                        proc.stdin.close()
+            
+            if sink is None:
+                feed()
+            else:
+                writer = threading.Thread(target=feed, daemon=True)
+                writer.start()
+                shutil.copyfileobj(proc.stdout, sink, length=1 << 20)
+                writer.join()
+                proc.stdout.close()
+            
+            returncode = proc.wait()
+            if errors:
+                raise errors[0]
+            if returncode != 0:
+                stderr.seek(0)
+                raise RuntimeError(
+                    f"ffmpeg {action} failed: {stderr.read().decode(errors='replace')}"
+                )
+
+
+class PydubPostProcessor(FastPostProcessor):
+    """AudioSegment-based post-processing for pydub callers."""
     
     def __init__(self):
         """Initialize post-processor."""
-        if not PYDUB_AVAILABLE:
+        if not _import_pydub():
             raise RuntimeError(
-                "pydub not installed. Install with: pip install pydub"
+                "pydub not installed. Install with: pip install 'audiobook-narrator[pydub]'"
             )
     
     def concatenate_segments(
         self,
         audio_segments: List[bytes],
         pause_ms: List[int]
-    ) -> AudioSegment:
+    ) -> "AudioSegment":
         """Concatenate audio segments with pauses.
         
         Args:
-            audio_segments: List of raw WAV audio bytes
+            audio_segments: List of raw 16-bit mono PCM bytes
             pause_ms: List of pause durations after each segment
             
         Returns:
@@ -40,26 +334,18 @@ class PostProcessor:
         if not audio_segments:
             return AudioSegment.empty()
         
-        combined = AudioSegment.empty()
-        
-        for i, segment_bytes in enumerate(audio_segments):
-            # Load segment
-            segment = AudioSegment.from_wav(io.BytesIO(segment_bytes))
-            
-            # Add segment to output
-            combined += segment
-            
-            # Add pause (except after last segment)
-            if i < len(audio_segments) - 1:
-                pause_duration = pause_ms[i] if i < len(pause_ms) else 500
-                silence = AudioSegment.silent(duration=pause_duration)
-                combined += silence
+        samples = self.concat_numpy(audio_segments, pause_ms)
         
-        return combined
+        return AudioSegment(
+            data=samples.tobytes(),
+            sample_width=SAMPLE_WIDTH,
+            frame_rate=SAMPLE_RATE,
+            channels=CHANNELS
+        )
     
     def normalize_audio(
         self,
-        audio: AudioSegment,
+        audio: "AudioSegment",
         target_lufs: float = -16.0,
         true_peak: float = -1.5,
         lra: float = 11.0
@@ -75,40 +361,48 @@ class PostProcessor:
         Returns:
             Normalized audio as WAV bytes
         """
-        # Export to temp file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_in:
-            audio.export(temp_in.name, format='wav')
-            temp_in_path = temp_in.name
+        # Feed raw PCM on stdin and stream WAV back from stdout
+        cmd = self._ffmpeg_command(
+            'pipe:1',
+            'wav',
+            f'loudnorm=I={target_lufs}:TP={true_peak}:LRA={lra}'
+        )
+        output = io.BytesIO()
+        self._run_ffmpeg(cmd, [self._to_pcm(audio)], 'normalization', sink=output)
+        return output.getvalue()
+    
+    def normalize_to_file(
+        self,
+        audio: "AudioSegment",
+        output_path: str,
+        format: str = "wav",
+        target_lufs: float = -16.0,
+        true_peak: float = -1.5,
+        lra: float = 11.0
+    ):
+        """Normalize audio with ffmpeg loudnorm and write it to a file.
         
-        try:
-            # Run ffmpeg with loudnorm
-            cmd = [
-                'ffmpeg',
-                '-y',  # Overwrite output
-                '-i', temp_in_path,
-                '-af', f'loudnorm=I={target_lufs}:TP={true_peak}:LRA={lra}',
-                '-ar', '22050',  # Sample rate
-                '-ac', '1',  # Mono
-                '-f', 'wav',
-                'pipe:1'  # Output to stdout
-            ]
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                check=True
-            )
-            
-            return result.stdout
-            
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"ffmpeg normalization failed: {e.stderr.decode()}")
-        finally:
-            Path(temp_in_path).unlink(missing_ok=True)
+        Unlike normalize_audio, the normalized audio never comes back into
+        this process; ffmpeg writes it straight to output_path.
+        
+        Args:
+            audio: Input AudioSegment
+            output_path: Output file path
+            format: Output format (mp3, wav, ogg)
+            target_lufs: Target loudness in LUFS (default -16)
+            true_peak: True peak limit in dB (default -1.5)
+            lra: Loudness range in LU (default 11)
+        """
+        cmd = self._ffmpeg_command(
+            output_path,
+            format,
+            f'loudnorm=I={target_lufs}:TP={true_peak}:LRA={lra}'
+        )
+        self._run_ffmpeg(cmd, [self._to_pcm(audio)], 'normalization')
     
     def export_to_file(
         self,
-        audio: AudioSegment,
+        audio: "AudioSegment",
         output_path: str,
         format: str = "mp3",
         normalize: bool = True
@@ -121,29 +415,18 @@ class PostProcessor:
             format: Output format (mp3, wav, ogg)
             normalize: Whether to apply loudness normalization
         """
-        if normalize and format == 'wav':
-            # Use ffmpeg normalization for WAV
-            normalized_bytes = self.normalize_audio(audio)
-            with open(output_path, 'wb') as f:
-                f.write(normalized_bytes)
+        if normalize:
+            # Normalize and encode in a single ffmpeg pass
+            self.normalize_to_file(audio, output_path, format=format)
         else:
-            # Use pydub export (normalization optional)
-            if normalize:
-                # Export to temp, normalize, then convert
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_in:
-                    audio.export(temp_in.name, format='wav')
-                    temp_in_path = temp_in.name
-                
-                try:
-                    cmd = [
-                        'ffmpeg',
-                        '-y',
-                        '-i', temp_in_path,
-                        '-af', 'loudnorm=I=-16:TP=-1.5:LRA=11',
-                        output_path
-                    ]
-                    subprocess.run(cmd, capture_output=True, check=True)
-                finally:
-                    Path(temp_in_path).unlink(missing_ok=True)
-            else:
-                audio.export(output_path, format=format)
+            audio.export(output_path, format=format)
+    
+    def _to_pcm(self, audio: "AudioSegment") -> bytes:
+        """Return audio as raw PCM in the pipeline's sample format."""
+        audio = audio.set_frame_rate(SAMPLE_RATE)
+        audio = audio.set_channels(CHANNELS).set_sample_width(SAMPLE_WIDTH)
+        return audio.raw_data
+
+
+# Backwards-compatible name for the pydub-based processor
+PostProcessor = PydubPostProcessor
@@ -2,14 +2,20 @@
 """CLI entry point for audiobook narrator."""
 
 import argparse
-import json
 import sys
 from pathlib import Path
 
 from narrator.input_parser import InputParser
 from narrator.emotion_config import EmotionMapper
 from narrator.piper_wrapper import PiperWrapper
-from narrator.post_processor import PostProcessor
+from narrator.post_processor import FastPostProcessor
+
+
+def _report_progress(segments, audio_stream):
+    """Print a progress line for each segment as its audio arrives."""
+    for i, (segment, audio_bytes) in enumerate(zip(segments, audio_stream)):
+        print(f"   [{i+1}/{len(segments)}] {segment.emotion}: '{segment.text[:50]}...'")
+        yield audio_bytes
 
 
 def main():
@@ -47,6 +53,29 @@ def main():
         action='store_true',
         help='Skip loudness normalization'
     )
+    parser.add_argument(
+        '--normalizer',
+        choices=['loudnorm', 'rms'],
+        default='loudnorm',
+        help='Normalization method: ffmpeg EBU R128 loudnorm (default) or '
+             'a faster in-process RMS/peak gain'
+    )
+    parser.add_argument(
+        '--no-quantized',
+        action='store_true',
+        help='Ignore an int8 copy of the model (<model>.int8.onnx) if present'
+    )
+    parser.add_argument(
+        '--split-sentences',
+        action='store_true',
+        help='Synthesize each sentence separately for finer-grained pipelining'
+    )
+    parser.add_argument(
+        '-j', '--tts-concurrency',
+        type=int,
+        default=1,
+        help='Number of segments to synthesize concurrently (default: 1)'
+    )
     
     args = parser.parse_args()
     
@@ -60,6 +89,10 @@ def main():
         print(f"Error: Piper model not found: {args.model}", file=sys.stderr)
         sys.exit(1)
     
+    if args.tts_concurrency < 1:
+        print("Error: --tts-concurrency must be at least 1", file=sys.stderr)
+        sys.exit(1)
+    
     # Validate config exists
     if not Path(args.config).exists():
         print(f"Error: Config file not found: {args.config}", file=sys.stderr)
@@ -77,45 +110,58 @@ def main():
         emotion_mapper = EmotionMapper(args.config)
         
         print(f"Loading Piper model...")
-        piper = PiperWrapper(args.model)
+        piper = PiperWrapper(
+            args.model,
+            workers=args.tts_concurrency,
+            prefer_quantized=not args.no_quantized
+        )
+        if piper.onnx_path != args.model:
+            print(f"   Using quantized model: {piper.onnx_path}")
         
         print("Parsing input...")
-        input_parser = InputParser()
+        input_parser = InputParser(split_sentences=args.split_sentences)
         segments = input_parser.parse_file(args.input)
         print(f"   Found {len(segments)} segments")
         print(f"   Emotions: {set(s.emotion for s in segments)}")
         print()
         
-        # Generate audio for each segment
-        print("Generating audio segments...")
-        audio_segments = []
-        pause_durations = []
+        # Generate audio for each segment. Piper inference runs on a worker
+        # pool; segments are written out in order as they complete.
+        print(f"Generating audio and exporting to {args.output}...")
+        # Resolve each distinct emotion and pause once up front
+        configs = {
+            emotion: emotion_mapper.get_config(emotion)
+            for emotion in {s.emotion for s in segments}
+        }
+        pauses = {
+            pause: emotion_mapper.get_pause_ms(pause)
+            for pause in {s.pause_after for s in segments}
+        }
+        pause_durations = [pauses[segment.pause_after] for segment in segments]
+        jobs = ((segment.text, configs[segment.emotion]) for segment in segments)
+        audio_stream = piper.synthesize_batch(jobs)
         
-        for i, segment in enumerate(segments):
-            emotion_config = emotion_mapper.get_config(segment.emotion)
-            pause_ms = emotion_mapper.get_pause_ms(segment.pause_after)
-            
-            print(f"   [{i+1}/{len(segments)}] {segment.emotion}: '{segment.text[:50]}...'")
-            
-            audio_bytes = piper.synthesize(segment.text, emotion_config)
-            audio_segments.append(audio_bytes)
-            pause_durations.append(pause_ms)
+        post_processor = FastPostProcessor()
+        progress = _report_progress(segments, audio_stream)
         
-        print()
-        print("Concatenating and adding pauses...")
-        post_processor = PostProcessor()
-        combined = post_processor.concatenate_segments(
-            audio_segments,
-            pause_durations
-        )
-        
-        print(f"Exporting to {args.output}...")
-        post_processor.export_to_file(
-            combined,
-            args.output,
-            format=args.format,
-            normalize=not args.no_normalize
-        )
+        if args.normalizer == 'rms' and not args.no_normalize:
+            # In-process normalization needs the whole mix in memory
+            samples = post_processor.concat_numpy(list(progress), pause_durations)
+            samples = post_processor.normalize_numpy(samples)
+            post_processor.export_array(
+                samples,
+                args.output,
+                format=args.format,
+                normalize=False
+            )
+        else:
+            post_processor.export_concat_via_ffmpeg(
+                progress,
+                pause_durations,
+                args.output,
+                format=args.format,
+                normalize=not args.no_normalize
+            )
         
         print()
         print(f"✅ Done! Output saved to: {args.output}")
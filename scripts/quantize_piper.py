@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Quantize a Piper voice model's weights to int8 for faster CPU synthesis."""
+
+import argparse
+import sys
+from pathlib import Path
+
+
+def main():
+    """Main CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Create an int8 copy of a Piper .onnx voice model"
+    )
+    parser.add_argument(
+        'model',
+        help='Path to Piper voice model (.onnx file)'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        help='Output model path (default: <model>.int8.onnx next to the input)'
+    )
+    
+    args = parser.parse_args()
+    
+    try:
+        import onnxruntime
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError:
+        print("Error: onnxruntime not installed", file=sys.stderr)
+        sys.exit(1)
+    
+    model_path = Path(args.model)
+    if not model_path.exists():
+        print(f"Error: Piper model not found: {args.model}", file=sys.stderr)
+        sys.exit(1)
+    
+    output_path = args.output or str(model_path.with_suffix('.int8.onnx'))
+    
+    print(f"Quantizing {model_path} -> {output_path}...")
+    quantize_dynamic(
+        model_input=str(model_path),
+        model_output=output_path,
+        weight_type=QuantType.QInt8,
+        # Conv is left in float: int8-weight ConvInteger has no CPU kernel
+        op_types_to_quantize=['MatMul']
+    )
+    
+    # Make sure the quantized model actually loads before advertising it
+    try:
+        onnxruntime.InferenceSession(output_path, providers=['CPUExecutionProvider'])
+    except Exception as e:
+        Path(output_path).unlink(missing_ok=True)
+        print(f"Error: quantized model failed to load: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    # The narrator only looks for <model>.int8.onnx next to the model
+    if Path(output_path).resolve() == model_path.with_suffix('.int8.onnx').resolve():
+        print("✅ Done! The narrator picks up the int8 model automatically.")
+    else:
+        print(
+            f"✅ Done! Pass it with --model {output_path} to use it "
+            f"(with a copy of {model_path}.json next to it)."
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,23 @@
 """Tests for audiobook narrator."""
 
+import io
 import json
+import os
+import random
+import subprocess
+import sys
 import tempfile
+import time
+import wave
 from pathlib import Path
 
+import numpy as np
+
 from narrator.input_parser import InputParser, Segment
 from narrator.emotion_config import EmotionMapper, EmotionConfig
+from narrator import piper_wrapper
+from narrator.piper_wrapper import SAMPLE_RATE, PiperWrapper, wav_header
+from narrator.post_processor import FastPostProcessor
 
 
 def test_parse_segment():
@@ -56,6 +68,38 @@ def test_default_values():
     assert segments[0].pause_after == "medium"
 
 
+def test_split_sentences():
+    """Test splitting a segment into sentences keeps the final pause."""
+    parser = InputParser(split_sentences=True)
+    data = {
+        "segments": [
+            {
+                "text": "The door creaked. Who is there? Run!",
+                "emotion": "suspense",
+                "pause_after": "long"
+            }
+        ]
+    }
+    
+    segments = parser.parse(data)
+    
+    assert [s.text for s in segments] == ["The door creaked.", "Who is there?", "Run!"]
+    assert all(s.emotion == "suspense" for s in segments)
+    assert [s.pause_after for s in segments] == ["short", "short", "long"]
+
+
+def test_split_sentences_single_sentence():
+    """Test a single-sentence segment is left untouched."""
+    parser = InputParser(split_sentences=True)
+    data = {"segments": [{"text": "Just one.", "pause_after": "very_long"}]}
+    
+    segments = parser.parse(data)
+    
+    assert len(segments) == 1
+    assert segments[0].text == "Just one."
+    assert segments[0].pause_after == "very_long"
+
+
 def test_parse_file():
     """Test parsing from file."""
     parser = InputParser()
@@ -129,6 +173,46 @@ def test_emotion_mapper_defaults():
         Path(temp_path).unlink()
 
 
+def test_emotion_mapper_reloads_changed_config():
+    """Test emotion mapper re-reads the config when the file changes."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+        json.dump({"pauses": {"short": 100}}, f)
+        temp_path = f.name
+    
+    try:
+        assert EmotionMapper(temp_path).get_pause_ms("short") == 100
+        
+        with open(temp_path, 'w') as f:
+            json.dump({"pauses": {"short": 300}}, f)
+        mtime = os.path.getmtime(temp_path)
+        os.utime(temp_path, (mtime + 10, mtime + 10))
+        
+        assert EmotionMapper(temp_path).get_pause_ms("short") == 300
+    finally:
+        Path(temp_path).unlink()
+
+
+def test_emotion_mapper_shares_read_only_config():
+    """Test mappers over the same file share one read-only parse."""
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+        json.dump({"emotions": {"calm": {"length_scale": 1.1}}}, f)
+        temp_path = f.name
+    
+    try:
+        first = EmotionMapper(temp_path)
+        second = EmotionMapper(temp_path)
+        
+        assert first.emotions is second.emotions
+        try:
+            first.emotions["calm"] = EmotionMapper.DEFAULT_EMOTION
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("emotions mapping should be read-only")
+    finally:
+        Path(temp_path).unlink()
+
+
 def test_segment_dataclass():
     """Test Segment dataclass creation."""
     segment = Segment(text="Hello", emotion="suspense", pause_after="long")
@@ -153,19 +237,358 @@ def test_emotion_config_dataclass():
     assert config.description == "Test emotion"
 
 
+def test_concat_numpy_inserts_pauses():
+    """Test segments are joined with silence between, not after the last."""
+    processor = FastPostProcessor()
+    first = np.array([1, 2, 3], dtype=np.int16).tobytes()
+    second = np.array([4, 5], dtype=np.int16).tobytes()
+    
+    samples = processor.concat_numpy([first, second], [1, 1000], sr=2000)
+    
+    assert samples.dtype == np.int16
+    assert samples.tolist() == [1, 2, 3, 0, 0, 4, 5]
+
+
+def test_concat_numpy_empty():
+    """Test concatenating no segments yields an empty array."""
+    samples = FastPostProcessor().concat_numpy([], [])
+    
+    assert samples.dtype == np.int16
+    assert len(samples) == 0
+
+
+def test_normalize_numpy_reaches_target_rms():
+    """Test RMS normalization hits the target level when peaks allow."""
+    processor = FastPostProcessor()
+    samples = np.array([1000, -1000] * 500, dtype=np.int16)
+    
+    normalized = processor.normalize_numpy(samples, target_dbfs=-20.0, peak_dbfs=-1.0)
+    
+    rms = np.sqrt(np.mean(normalized.astype(np.float64) ** 2))
+    assert normalized.dtype == np.int16
+    assert abs(20 * np.log10(rms / 32768) - -20.0) < 0.1
+
+
+def test_normalize_numpy_respects_peak_ceiling():
+    """Test the gain is capped so peaks stay below the ceiling."""
+    processor = FastPostProcessor()
+    samples = np.zeros(1000, dtype=np.int16)
+    samples[0] = 1000
+    
+    normalized = processor.normalize_numpy(samples, target_dbfs=-3.0, peak_dbfs=-6.0)
+    
+    assert np.max(np.abs(normalized)) <= 32767 * 10 ** (-6.0 / 20)
+    assert np.max(np.abs(normalized)) > 32767 * 10 ** (-6.1 / 20)
+
+
+def test_normalize_numpy_silence():
+    """Test silence passes through unchanged."""
+    samples = np.zeros(100, dtype=np.int16)
+    
+    normalized = FastPostProcessor().normalize_numpy(samples)
+    
+    assert not normalized.any()
+
+
+def test_wav_header_round_trip():
+    """Test the hand-built WAV header is readable by the wave module."""
+    pcm = np.arange(100, dtype=np.int16).tobytes()
+    
+    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as f:
+        f.write(wav_header(len(pcm)) + pcm)
+        temp_path = f.name
+    
+    try:
+        with wave.open(temp_path, 'rb') as wav_file:
+            assert wav_file.getnchannels() == 1
+            assert wav_file.getsampwidth() == 2
+            assert wav_file.getframerate() == SAMPLE_RATE
+            assert wav_file.readframes(wav_file.getnframes()) == pcm
+    finally:
+        Path(temp_path).unlink()
+
+
+def test_piper_wrapper_model_selection():
+    """Test the int8 model is preferred only when present and allowed."""
+    original_available = piper_wrapper.PIPER_AVAILABLE
+    original_load = PiperWrapper._load_voice
+    piper_wrapper.PIPER_AVAILABLE = True
+    PiperWrapper._load_voice = lambda self: None
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = str(Path(temp_dir) / "voice.onnx")
+        quantized_path = str(Path(temp_dir) / "voice.int8.onnx")
+        Path(model_path).touch()
+        
+        try:
+            assert PiperWrapper(model_path).onnx_path == model_path
+            
+            Path(quantized_path).touch()
+            assert PiperWrapper(model_path).onnx_path == quantized_path
+            assert PiperWrapper(
+                model_path, prefer_quantized=False
+            ).onnx_path == model_path
+        finally:
+            piper_wrapper.PIPER_AVAILABLE = original_available
+            PiperWrapper._load_voice = original_load
+
+
+def test_piper_wrapper_falls_back_from_bad_quantized_model():
+    """Test a quantized model that fails to load falls back to the original."""
+    original_available = piper_wrapper.PIPER_AVAILABLE
+    original_build = PiperWrapper._build_voice
+    piper_wrapper.PIPER_AVAILABLE = True
+    
+    def build_voice(self):
+        if self.onnx_path.endswith('.int8.onnx'):
+            raise RuntimeError("Could not find an implementation for ConvInteger")
+        return "original voice"
+    
+    PiperWrapper._build_voice = build_voice
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = str(Path(temp_dir) / "voice.onnx")
+        Path(model_path).touch()
+        Path(temp_dir, "voice.int8.onnx").touch()
+        
+        try:
+            wrapper = PiperWrapper(model_path)
+            assert wrapper.onnx_path == model_path
+            assert wrapper.voice == "original voice"
+        finally:
+            piper_wrapper.PIPER_AVAILABLE = original_available
+            PiperWrapper._build_voice = original_build
+
+
+def test_voice_cache_drops_stale_models_and_is_bounded():
+    """Test a changed model frees old sessions and the voice cache is bounded."""
+    original_available = piper_wrapper.PIPER_AVAILABLE
+    original_build = PiperWrapper._build_voice
+    original_cache = dict(piper_wrapper._VOICE_CACHE)
+    piper_wrapper.PIPER_AVAILABLE = True
+    PiperWrapper._build_voice = lambda self: object()
+    piper_wrapper._VOICE_CACHE.clear()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = str(Path(temp_dir) / "voice.onnx")
+        Path(model_path).touch()
+        os.utime(model_path, (1, 1))
+        
+        try:
+            for workers in (1, 2, 3):
+                PiperWrapper(model_path, workers=workers)
+            assert PiperWrapper(model_path).voice is PiperWrapper(model_path).voice
+            assert len(piper_wrapper._VOICE_CACHE) == 3
+            
+            os.utime(model_path, (2, 2))
+            PiperWrapper(model_path)
+            assert list(piper_wrapper._VOICE_CACHE) == [
+                (os.path.abspath(model_path), 2.0, 1)
+            ]
+            
+            for workers in range(1, 10):
+                PiperWrapper(model_path, workers=workers)
+            assert len(piper_wrapper._VOICE_CACHE) == piper_wrapper._VOICE_CACHE_MAXSIZE
+        finally:
+            piper_wrapper.PIPER_AVAILABLE = original_available
+            PiperWrapper._build_voice = original_build
+            piper_wrapper._VOICE_CACHE.clear()
+            piper_wrapper._VOICE_CACHE.update(original_cache)
+
+
+def test_synthesizer_binds_emotion_without_mutating_voice():
+    """Test synthesizer streams sentences with the config passed as kwargs."""
+    calls = []
+    
+    class StubConfig:
+        length_scale = 1.0
+        noise_scale = 0.667
+        noise_w = 0.8
+    
+    class StubVoice:
+        config = StubConfig()
+        
+        def phonemize(self, text):
+            return [list(sentence) for sentence in text.split('. ')]
+        
+        def phonemes_to_ids(self, phonemes):
+            return [ord(p) for p in phonemes]
+        
+        def synthesize_ids_to_raw(self, phoneme_ids, **kwargs):
+            calls.append(kwargs)
+            return bytes(phoneme_ids)
+    
+    wrapper = object.__new__(PiperWrapper)
+    wrapper.voice = StubVoice()
+    wrapper._synthesizers = {}
+    config = EmotionConfig(length_scale=1.2, noise_scale=0.3, noise_w=0.9)
+    voice_config = dict(vars(StubConfig))
+    
+    synthesize_text = wrapper.synthesizer(config)
+    
+    assert synthesize_text is wrapper.synthesizer(config)
+    assert list(synthesize_text("ab. cd")) == [b'ab', b'cd']
+    assert calls == [
+        {"length_scale": 1.2, "noise_scale": 0.3, "noise_w": 0.9}
+    ] * 2
+    assert wrapper.synthesize("ef. gh", config) == b'efgh'
+    assert not vars(wrapper.voice.config)
+    assert dict(vars(StubConfig)) == voice_config
+
+
+def test_synthesize_batch_ordered_and_bounded():
+    """Test batch results keep job order and in-flight work stays bounded."""
+    original_executor = piper_wrapper.ThreadPoolExecutor
+    state = {"submitted": 0, "consumed": 0, "max_pending": 0}
+    
+    class CountingExecutor(original_executor):
+        def submit(self, *args, **kwargs):
+            state["submitted"] += 1
+            state["max_pending"] = max(
+                state["max_pending"], state["submitted"] - state["consumed"]
+            )
+            return super().submit(*args, **kwargs)
+    
+    def synthesize(text, config):
+        time.sleep(random.random() / 200)
+        return text.encode()
+    
+    wrapper = object.__new__(PiperWrapper)
+    wrapper.workers = 1
+    wrapper.synthesize = synthesize
+    piper_wrapper.ThreadPoolExecutor = CountingExecutor
+    
+    try:
+        for workers in (1, 3):
+            state.update(submitted=0, consumed=0, max_pending=0)
+            jobs = ((str(i), None) for i in range(20))
+            results = []
+            for audio in wrapper.synthesize_batch(jobs, workers=workers):
+                state["consumed"] += 1
+                results.append(audio)
+            
+            assert results == [str(i).encode() for i in range(20)]
+            assert state["max_pending"] <= workers + 1
+    finally:
+        piper_wrapper.ThreadPoolExecutor = original_executor
+    
+    for workers in (0, -1):
+        try:
+            list(wrapper.synthesize_batch([("text", None)], workers=workers))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"workers={workers} should raise ValueError")
+
+
+def test_export_concat_wav_streams_pauses_between_segments():
+    """Test the streaming WAV export puts pauses between segments only."""
+    first = np.full(100, 1, dtype=np.int16).tobytes()
+    second = np.full(50, 2, dtype=np.int16).tobytes()
+    pause_samples = int(10 * SAMPLE_RATE / 1000)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_path = str(Path(temp_dir) / "out.wav")
+        FastPostProcessor().export_concat_via_ffmpeg(
+            iter([first, second]),
+            [10, 1000],
+            output_path,
+            format='wav',
+            normalize=False
+        )
+        
+        with wave.open(output_path, 'rb') as wav_file:
+            assert wav_file.getframerate() == SAMPLE_RATE
+            assert wav_file.getnframes() == 100 + pause_samples + 50
+            samples = np.frombuffer(
+                wav_file.readframes(wav_file.getnframes()), dtype=np.int16
+            )
+    
+    assert (samples[:100] == 1).all()
+    assert not samples[100:100 + pause_samples].any()
+    assert (samples[100 + pause_samples:] == 2).all()
+
+
+def test_run_ffmpeg_copies_stdout_into_sink():
+    """Test piped output is copied into the sink."""
+    sink = io.BytesIO()
+    
+    FastPostProcessor()._run_ffmpeg(['cat'], [b'abc', b'def'], 'test', sink=sink)
+    
+    assert sink.getvalue() == b'abcdef'
+
+
+def test_run_ffmpeg_nonzero_exit_raises():
+    """Test a failing process is reported as RuntimeError."""
+    try:
+        FastPostProcessor()._run_ffmpeg(['false'], [b'abc'], 'test')
+    except RuntimeError as e:
+        assert "ffmpeg test failed" in str(e)
+    else:
+        raise AssertionError("non-zero exit should raise RuntimeError")
+
+
+def test_run_ffmpeg_reraises_chunk_errors():
+    """Test errors from the chunk source kill the process and propagate."""
+    def chunks():
+        yield b'abc'
+        raise ValueError("synthesis failed")
+    
+    for cmd, sink in ((['sh', '-c', 'cat > /dev/null'], None), (['cat'], io.BytesIO())):
+        try:
+            FastPostProcessor()._run_ffmpeg(cmd, chunks(), 'test', sink=sink)
+        except ValueError as e:
+            assert str(e) == "synthesis failed"
+        else:
+            raise AssertionError("chunk errors should propagate")
+
+
+def test_fast_post_processor_does_not_load_pydub():
+    """Test the default post-processor path never imports pydub."""
+    code = (
+        "import sys\n"
+        "from narrator.post_processor import FastPostProcessor\n"
+        "FastPostProcessor()\n"
+        "assert 'pydub' not in sys.modules\n"
+    )
+    subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=Path(__file__).resolve().parent.parent,
+        check=True
+    )
+
+
 if __name__ == '__main__':
     # Run tests
-    import sys
-    
     tests = [
         test_parse_segment,
         test_parse_multiple_segments,
         test_default_values,
+        test_split_sentences,
+        test_split_sentences_single_sentence,
         test_parse_file,
         test_emotion_mapper_loads_config,
         test_emotion_mapper_defaults,
+        test_emotion_mapper_reloads_changed_config,
+        test_emotion_mapper_shares_read_only_config,
         test_segment_dataclass,
         test_emotion_config_dataclass,
+        test_concat_numpy_inserts_pauses,
+        test_concat_numpy_empty,
+        test_normalize_numpy_reaches_target_rms,
+        test_normalize_numpy_respects_peak_ceiling,
+        test_normalize_numpy_silence,
+        test_wav_header_round_trip,
+        test_piper_wrapper_model_selection,
+        test_piper_wrapper_falls_back_from_bad_quantized_model,
+        test_voice_cache_drops_stale_models_and_is_bounded,
+        test_synthesizer_binds_emotion_without_mutating_voice,
+        test_synthesize_batch_ordered_and_bounded,
+        test_export_concat_wav_streams_pauses_between_segments,
+        test_run_ffmpeg_copies_stdout_into_sink,
+        test_run_ffmpeg_nonzero_exit_raises,
+        test_run_ffmpeg_reraises_chunk_errors,
+        test_fast_post_processor_does_not_load_pydub,
     ]
     
     failed = 0